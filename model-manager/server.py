@@ -712,8 +712,9 @@ def build_vllm_command(model_id: str, model_config: dict) -> list:
 
     Supports all vLLM settings from models.yaml including:
     - Context length, concurrency, memory utilization
-    - Swap space, dtype, KV cache settings
+    - Swap space, dtype, quantization, KV cache settings
     - Tool calling, prefix caching, chunked prefill
+    - Attention backend selection (FlashAttention/FlashInfer)
     - Mistral-specific tokenizer settings
     """
     settings = model_config.get("settings", {})
@@ -741,10 +742,17 @@ def build_vllm_command(model_id: str, model_config: dict) -> list:
         "-p", f"{port}:8000",
         "-v", f"{HOST_HF_CACHE_DIR}:/root/.cache/huggingface",
         "--restart", settings.get("restart_policy", "unless-stopped"),
+    ]
+
+    # Attention kernel backend (e.g. FLASH_ATTN, FLASHINFER); vLLM picks one if unset
+    if settings.get("attention_backend"):
+        cmd.extend(["-e", f"VLLM_ATTENTION_BACKEND={settings['attention_backend']}"])
+
+    cmd.extend([
         image,
         "vllm", "serve", model,
         "--served-model-name", model_id,  # Use alias so frontend can reference by model key
-    ]
+    ])
 
     # Core vLLM settings
     cmd.extend(["--max-model-len", str(settings.get("max_model_len", 32768))])
@@ -756,6 +764,10 @@ def build_vllm_command(model_id: str, model_config: dict) -> list:
     if "swap_space" in settings:
         cmd.extend(["--swap-space", str(settings["swap_space"])])
 
+    # Weight quantization (fp8, awq, ...); prequantized checkpoints are auto-detected
+    if settings.get("quantization"):
+        cmd.extend(["--quantization", settings["quantization"]])
+
     # KV cache dtype
     if "kv_cache_dtype" in settings:
         cmd.extend(["--kv-cache-dtype", settings["kv_cache_dtype"]])
@@ -763,12 +775,18 @@ def build_vllm_command(model_id: str, model_config: dict) -> list:
     # Performance features
     if settings.get("enable_prefix_caching"):
         cmd.append("--enable-prefix-caching")
+    # Multimodal processor overrides, e.g. {"max_pixels": ...} to cap visual tokens per image
+    if settings.get("mm_processor_kwargs"):
+        cmd.extend(["--mm-processor-kwargs", json.dumps(settings["mm_processor_kwargs"])])
     if settings.get("enable_chunked_prefill"):
         cmd.append("--enable-chunked-prefill")
 
     # Execution mode
     if settings.get("enforce_eager"):
         cmd.append("--enforce-eager")
+    # torch.compile / CUDA graph tuning, e.g. {"cudagraph_capture_sizes": [1, 2, 4, 8]}
+    if settings.get("compilation_config"):
+        cmd.extend(["--compilation-config", json.dumps(settings["compilation_config"])])
     if settings.get("trust_remote_code"):
         cmd.append("--trust-remote-code")
 
@@ -786,6 +804,12 @@ def build_vllm_command(model_id: str, model_config: dict) -> list:
     # Tensor parallelism (for multi-GPU)
     if "tensor_parallel_size" in settings and settings["tensor_parallel_size"] > 1:
         cmd.extend(["--tensor-parallel-size", str(settings["tensor_parallel_size"])])
+        # Run the vision encoder data-parallel instead of sharding it ("data" or "weights")
+        if settings.get("mm_encoder_tp_mode"):
+            cmd.extend(["--mm-encoder-tp-mode", settings["mm_encoder_tp_mode"]])
+        # Shard MoE experts across the TP group (all-to-all dispatch) instead of slicing each expert
+        if settings.get("enable_expert_parallel"):
+            cmd.append("--enable-expert-parallel")
 
     return cmd
 
@@ -38,11 +38,14 @@ TOOL_CALL_PARSER="hermes"        # Tool call parser (hermes works well with Qwen
 
 # Vision-specific settings
 # Qwen2-VL supports image inputs through the chat API
-# Max image size will be handled automatically
+# Cap visual tokens per image: 1280 tokens x 28x28 pixels each. High-resolution
+# images are downscaled before the ViT, shrinking prefill (and TTFT) for large photos
+MAX_PIXELS=1003520
 
 # Optional: Multi-GPU settings (uncomment if using multiple GPUs)
 # TENSOR_PARALLEL_SIZE=2         # Number of GPUs for tensor parallelism
 # PIPELINE_PARALLEL_SIZE=1       # Number of GPUs for pipeline parallelism
+# MM_ENCODER_TP_MODE=data        # Replicate the vision encoder per GPU instead of sharding it
 
 # ==============================================================================
 # Check if container already exists
@@ -81,6 +84,7 @@ DOCKER_CMD="docker run -d \
   --max-num-seqs ${MAX_NUM_SEQS} \
   --gpu-memory-utilization ${GPU_MEMORY_UTILIZATION} \
   --dtype ${DTYPE} \
+  --mm-processor-kwargs '{\"max_pixels\": ${MAX_PIXELS}}' \
   --allowed-origins '[\"*\"]'"
 
 # Add optional features
@@ -106,6 +110,10 @@ if [ -n "$PIPELINE_PARALLEL_SIZE" ]; then
   DOCKER_CMD="$DOCKER_CMD --pipeline-parallel-size ${PIPELINE_PARALLEL_SIZE}"
 fi
 
+if [ -n "$MM_ENCODER_TP_MODE" ]; then
+  DOCKER_CMD="$DOCKER_CMD --mm-encoder-tp-mode ${MM_ENCODER_TP_MODE}"
+fi
+
 # ==============================================================================
 # Run the server
 # ==============================================================================
@@ -2,27 +2,73 @@
 """
 Test script for Qwen2-VL-7B vision model
 Demonstrates image understanding, OCR, and multimodal capabilities
+
+Independent tests are sent concurrently over one shared aiohttp session so
+the server can batch their prefills instead of serving them one by one.
 """
 
+import asyncio
 import base64
-import requests
 import json
+import mmap
+import time
+import aiohttp
 from pathlib import Path
 
+try:
+    import orjson
+
+    def dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    # Stdlib fallback; orjson encodes large base64 payloads several times faster
+    def dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
 # API endpoint
 API_URL = "http://localhost:8101/v1/chat/completions"
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 def encode_image_to_base64(image_path):
-    """Encode image file to base64 string"""
+    """Encode image file to base64 string (reads through mmap, no extra copy)"""
     with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return base64.b64encode(data).decode('ascii')
 
-def test_vision_with_url():
-    """Test 1: Analyze an image from URL"""
+def print_header(title):
+    """Print a test section header"""
     print("=" * 60)
-    print("TEST 1: Analyzing image from URL")
+    print(title)
     print("=" * 60)
 
+async def post_chat(session, payload):
+    """POST a chat completion; returns (result, error)"""
+    async with session.post(API_URL, data=dumps(payload), headers=JSON_HEADERS) as response:
+        if response.status == 200:
+            return await response.json(), None
+        return None, f"{response.status}\n{await response.text()}"
+
+async def stream_chat(session, payload):
+    """POST a streaming chat completion; yields content deltas from the SSE stream"""
+    body = {**payload, "stream": True}
+    async with session.post(API_URL, data=dumps(body), headers=JSON_HEADERS) as response:
+        if response.status != 200:
+            raise RuntimeError(f"{response.status}\n{await response.text()}")
+        async for line in response.content:
+            line = line.strip()
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                break
+            choices = json.loads(data).get("choices")
+            if choices:
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+async def test_vision_with_url(session):
+    """Test 1: Analyze an image from URL"""
     payload = {
         "model": "Qwen/Qwen2-VL-7B-Instruct",
         "messages": [
@@ -45,20 +91,17 @@ def test_vision_with_url():
         "max_tokens": 300
     }
 
-    response = requests.post(API_URL, json=payload)
-    if response.status_code == 200:
-        result = response.json()
+    result, error = await post_chat(session, payload)
+    print_header("TEST 1: Analyzing image from URL")
+    if result:
         print(f"\n✓ Response:\n{result['choices'][0]['message']['content']}\n")
     else:
-        print(f"\n✗ Error: {response.status_code}\n{response.text}\n")
+        print(f"\n✗ Error: {error}\n")
 
-def test_vision_with_local_image(image_path):
+async def test_vision_with_local_image(session, image_path):
     """Test 2: Analyze a local image"""
-    print("=" * 60)
-    print(f"TEST 2: Analyzing local image: {image_path}")
-    print("=" * 60)
-
     if not Path(image_path).exists():
+        print_header(f"TEST 2: Analyzing local image: {image_path}")
         print(f"\n⚠️ Image not found: {image_path}")
         print("Skipping this test. Provide your own image path to test.\n")
         return
@@ -87,19 +130,15 @@ def test_vision_with_local_image(image_path):
         "max_tokens": 300
     }
 
-    response = requests.post(API_URL, json=payload)
-    if response.status_code == 200:
-        result = response.json()
+    result, error = await post_chat(session, payload)
+    print_header(f"TEST 2: Analyzing local image: {image_path}")
+    if result:
         print(f"\n✓ Response:\n{result['choices'][0]['message']['content']}\n")
     else:
-        print(f"\n✗ Error: {response.status_code}\n{response.text}\n")
+        print(f"\n✗ Error: {error}\n")
 
-def test_ocr_capability():
+async def test_ocr_capability(session):
     """Test 3: OCR from image with text"""
-    print("=" * 60)
-    print("TEST 3: OCR - Extract text from image")
-    print("=" * 60)
-
     payload = {
         "model": "Qwen/Qwen2-VL-7B-Instruct",
         "messages": [
@@ -122,19 +161,29 @@ def test_ocr_capability():
         "max_tokens": 500
     }
 
-    response = requests.post(API_URL, json=payload)
-    if response.status_code == 200:
-        result = response.json()
-        print(f"\n✓ Response:\n{result['choices'][0]['message']['content']}\n")
+    # Long response: stream it so the first tokens arrive while decoding continues
+    start = time.time()
+    first_token_time = None
+    parts = []
+    error = None
+    try:
+        async for delta in stream_chat(session, payload):
+            if first_token_time is None:
+                first_token_time = time.time() - start
+            parts.append(delta)
+    except RuntimeError as e:
+        error = str(e)
+
+    print_header("TEST 3: OCR - Extract text from image")
+    if error:
+        print(f"\n✗ Error: {error}\n")
     else:
-        print(f"\n✗ Error: {response.status_code}\n{response.text}\n")
+        ttft = f"{first_token_time:.2f}s" if first_token_time is not None else "n/a"
+        print(f"\n✓ Response (streamed, first token {ttft}, total {time.time() - start:.2f}s):")
+        print(f"{''.join(parts)}\n")
 
-def test_multi_turn_conversation():
+async def test_multi_turn_conversation(session):
     """Test 4: Multi-turn conversation about an image"""
-    print("=" * 60)
-    print("TEST 4: Multi-turn conversation")
-    print("=" * 60)
-
     # First turn
     payload = {
         "model": "Qwen/Qwen2-VL-7B-Instruct",
@@ -158,51 +207,58 @@ def test_multi_turn_conversation():
         "max_tokens": 100
     }
 
-    response = requests.post(API_URL, json=payload)
-    if response.status_code == 200:
-        result = response.json()
-        first_response = result['choices'][0]['message']['content']
-        print(f"\n✓ Turn 1 Response:\n{first_response}\n")
-
-        # Second turn - follow up question
-        payload["messages"].append({"role": "assistant", "content": first_response})
-        payload["messages"].append({
-            "role": "user",
-            "content": "What time of day does it appear to be?"
-        })
-
-        response = requests.post(API_URL, json=payload)
-        if response.status_code == 200:
-            result = response.json()
-            print(f"✓ Turn 2 Response:\n{result['choices'][0]['message']['content']}\n")
+    result, error = await post_chat(session, payload)
+    if not result:
+        print_header("TEST 4: Multi-turn conversation")
+        print(f"\n✗ Error: {error}\n")
+        return
+
+    first_response = result['choices'][0]['message']['content']
+
+    # Second turn - follow up question (depends on the first answer)
+    payload["messages"].append({"role": "assistant", "content": first_response})
+    payload["messages"].append({
+        "role": "user",
+        "content": "What time of day does it appear to be?"
+    })
+
+    result, error = await post_chat(session, payload)
+    print_header("TEST 4: Multi-turn conversation")
+    print(f"\n✓ Turn 1 Response:\n{first_response}\n")
+    if result:
+        print(f"✓ Turn 2 Response:\n{result['choices'][0]['message']['content']}\n")
     else:
-        print(f"\n✗ Error: {response.status_code}\n{response.text}\n")
+        print(f"✗ Turn 2 Error: {error}\n")
 
-def main():
+async def main():
     print("\n" + "=" * 60)
     print("Qwen2-VL-7B Vision Model Test Suite")
     print("API: http://localhost:8101")
     print("=" * 60 + "\n")
 
     try:
-        # Test 1: Image from URL
-        test_vision_with_url()
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(
+                # Test 1: Image from URL
+                test_vision_with_url(session),
 
-        # Test 2: Local image (provide your own path)
-        # test_vision_with_local_image("/path/to/your/image.jpg")
+                # Test 2: Local image (provide your own path)
+                # test_vision_with_local_image(session, "/path/to/your/image.jpg"),
 
-        # Test 3: OCR capabilities
-        test_ocr_capability()
+                # Test 3: OCR capabilities
+                test_ocr_capability(session),
 
-        # Test 4: Multi-turn conversation
-        test_multi_turn_conversation()
+                # Test 4: Multi-turn conversation
+                test_multi_turn_conversation(session),
+            )
 
         print("=" * 60)
         print("✓ All tests completed!")
         print("=" * 60)
 
         print("\n📝 Next Steps:")
-        print("1. Try with your own images: test_vision_with_local_image('your_image.jpg')")
+        print("1. Try with your own images: test_vision_with_local_image(session, 'your_image.jpg')")
         print("2. Test PDF screenshots for document processing")
         print("3. Test Excel screenshots for table understanding")
         print("4. Build a document processing pipeline!")
@@ -211,4 +267,4 @@ def main():
         print(f"\n✗ Test failed: {e}")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -39,6 +39,7 @@ TOOL_CALL_PARSER="qwen3_coder"   # Use Qwen3 Coder parser
 # Optional: Multi-GPU settings (uncomment if using multiple GPUs)
 # TENSOR_PARALLEL_SIZE=2         # Number of GPUs for tensor parallelism
 # PIPELINE_PARALLEL_SIZE=1       # Number of GPUs for pipeline parallelism
+# ENABLE_EXPERT_PARALLEL=true    # Shard MoE experts across GPUs (needs TENSOR_PARALLEL_SIZE > 1)
 
 # ==============================================================================
 # Check if container already exists
@@ -105,6 +106,10 @@ if [ -n "$PIPELINE_PARALLEL_SIZE" ]; then
   DOCKER_CMD="$DOCKER_CMD --pipeline-parallel-size ${PIPELINE_PARALLEL_SIZE}"
 fi
 
+if [ "$ENABLE_EXPERT_PARALLEL" = true ]; then
+  DOCKER_CMD="$DOCKER_CMD --enable-expert-parallel"
+fi
+
 # ==============================================================================
 # Run the server
 # ==============================================================================
@@ -3,6 +3,11 @@ import aiohttp
 import time
 import json
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # Falls back to the default asyncio event loop
+
 API_URL = "http://localhost:8100/v1/chat/completions"
 
 async def make_request(session, request_id):
@@ -45,7 +50,7 @@ async def make_request(session, request_id):
             "error": str(e)
         }
 
-async def test_concurrent_requests(num_requests):
+async def test_concurrent_requests(session, num_requests):
     """Test multiple concurrent requests"""
     print(f"\n{'='*60}")
     print(f"Testing {num_requests} concurrent requests...")
@@ -53,9 +58,13 @@ async def test_concurrent_requests(num_requests):
 
     start_time = time.time()
 
-    async with aiohttp.ClientSession() as session:
-        tasks = [make_request(session, i+1) for i in range(num_requests)]
-        results = await asyncio.gather(*tasks)
+    tasks = [make_request(session, i+1) for i in range(num_requests)]
+    results = []
+    # Report requests as they finish instead of waiting for the slowest one
+    for next_done in asyncio.as_completed(tasks):
+        result = await next_done
+        results.append(result)
+        print(f"  Request #{result['request_id']}: {result['status']} ({result['elapsed']:.2f}s)")
 
     total_time = time.time() - start_time
 
@@ -89,15 +98,25 @@ async def main():
     print(f"\nTesting vLLM API Concurrent Request Handling")
     print(f"API URL: {API_URL}")
 
-    for size in test_sizes:
-        success = await test_concurrent_requests(size)
-        if not success:
-            print(f"⚠️  Some requests failed at {size} concurrent requests")
-        else:
-            print(f"✓ All {size} requests succeeded")
+    # One session for all rounds: no connection cap, keep-alive connections stay warm
+    connector = aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=0,
+        ttl_dns_cache=300,
+        force_close=False,
+        enable_cleanup_closed=True,
+        keepalive_timeout=300,
+    )
+    async with aiohttp.ClientSession(connector=connector) as session:
+        for size in test_sizes:
+            success = await test_concurrent_requests(session, size)
+            if not success:
+                print(f"⚠️  Some requests failed at {size} concurrent requests")
+            else:
+                print(f"✓ All {size} requests succeeded")
 
-        # Small delay between test rounds
-        await asyncio.sleep(2)
+            # Small delay between test rounds
+            await asyncio.sleep(2)
 
     print("\n" + "="*60)
     print("CONCLUSION:")
@@ -108,4 +127,6 @@ async def main():
     print("="*60 + "\n")
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
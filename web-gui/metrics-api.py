@@ -6,34 +6,323 @@ Provides real-time system metrics, GPU information, vLLM model status,
 and Docker container information.
 """
 
-import json
+import asyncio
+import functools
+import logging
 import os
+import re
 import sys
 import subprocess
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 import uvicorn
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import psutil
+import pynvml
 
 # Add parent directory to path for shared module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from shared.auth import add_auth_middleware
 
-# Initialize CPU percent on startup to establish baseline
+logger = logging.getLogger("metrics-api")
+# Repeating failures (a model server down, no Docker socket) are logged at most
+# once per LOG_THROTTLE_SECONDS per key instead of on every poll
+LOG_THROTTLE_SECONDS = 60.0
+_last_logged: Dict[str, float] = {}
+
+
+def log_throttled(key: str, msg: str, *args):
+    """Log a warning unless the same `key` was logged in the last LOG_THROTTLE_SECONDS"""
+    now = time.monotonic()
+    last = _last_logged.get(key)
+    if last is None or now - last >= LOG_THROTTLE_SECONDS:
+        _last_logged[key] = now
+        logger.warning(msg, *args)
+
+
+# NVML device handles, populated once at startup (empty if NVML is unavailable)
+_GPU_HANDLES: List[Any] = []
+# Static per-GPU attributes (name, power limit, memory total), read once at startup
+_GPU_STATIC: List[Dict[str, Any]] = []
+# Shared async HTTP client for model health probes and the chat proxy
+_HTTPX: Optional[httpx.AsyncClient] = None
+# Pooled keep-alive session for search and page fetches
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+# Latest GPU/system/container readings, replaced wholesale by the background poller
+_SNAPSHOT: Dict[str, Any] = {}
+POLL_INTERVAL = 0.5
+
+# Opt-in fallback for process memory when running in a container without host
+# PID visibility: nvidia-smi via `docker exec` into a long-lived CUDA container
+DIND_FALLBACK = os.getenv("DGX_ENABLE_DIND_FALLBACK", "").lower() == "true"
+DIND_IMAGE = "nvidia/cuda:12.0.0-base-ubuntu20.04"
+DIND_CONTAINER = "dgx-metrics-smi"
+_DIND_READY = threading.Event()
+_DIND_STOP = threading.Event()
+
+# nvidia-smi fallback: static attributes are queried once; only the changing
+# fields are polled, and the latest streamed row per GPU index is kept by read_smi_stream
+SMI_QUERY_STATIC = "--query-gpu=index,name,power.limit,memory.total"
+SMI_QUERY_GPU = "--query-gpu=index,temperature.gpu,power.draw,memory.used,utilization.gpu"
+SMI_STREAM_MS = 500
+# Streamed rows older than this are ignored (hung collector or error rows); a
+# stale or exited collector is restarted at most once per SMI_RESTART_SECONDS
+SMI_STALE_SECONDS = 4 * SMI_STREAM_MS / 1000
+SMI_RESTART_SECONDS = 30.0
+# Fixed argv and a minimal environment for the nvidia-smi calls made while polling;
+# their output is plain ASCII, so it is read as bytes and decoded once
+_GPU_CMD = ("nvidia-smi", SMI_QUERY_GPU, "--format=csv,noheader,nounits")
+_APPS_CMD = ("nvidia-smi", "--query-compute-apps=gpu_uuid,used_memory", "--format=csv,noheader,nounits")
+_DIND_APPS_CMD = (
+    "docker", "exec", DIND_CONTAINER,
+    "nvidia-smi", "--query-compute-apps=pid,used_memory", "--format=csv,noheader,nounits",
+)
+_SMI_ENV = {k: os.environ[k] for k in ("PATH", "LD_LIBRARY_PATH") if k in os.environ}
+_SMI_STATIC: Dict[int, Dict[str, Any]] = {}
+# GPU index -> (time.monotonic() when read, reading), written by the current collector
+_SMI_LATEST: Dict[int, tuple] = {}
+_SMI_LOCK = threading.Lock()
+_SMI_PROC: Optional[subprocess.Popen] = None
+_smi_started = 0.0
+
+# Docker Engine API over the UNIX socket (no `docker` CLI fork per request)
+DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+_DOCKER = httpx.Client(
+    transport=httpx.HTTPTransport(uds=DOCKER_SOCKET),
+    base_url="http://docker",
+    timeout=5.0,
+)
+
+
+def check_persistence_mode():
+    """Warn when GPU persistence mode is off.
+
+    Without persistence mode the driver is torn down whenever no client holds
+    it open, so every one-shot nvidia-smi call pays a re-initialization of
+    hundreds of milliseconds.
+    """
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=persistence_mode", "--format=csv,noheader"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning("Could not check GPU persistence mode: %s", e)
+        return
+
+    if "Disabled" in result.stdout:
+        logger.warning("GPU persistence mode is disabled; one-shot nvidia-smi calls will "
+                       "re-initialize the driver. Enable it with `sudo nvidia-smi -pm 1`.")
+
+
+def start_smi_stream():
+    """Start a long-lived `nvidia-smi -lms` collector for when NVML is unavailable.
+
+    One process initializes the driver once and prints a CSV row per GPU every
+    SMI_STREAM_MS; a daemon thread parses the rows into `_SMI_LATEST`, so polls
+    read memory instead of forking nvidia-smi. The running process also keeps
+    the driver resident when persistence mode is off.
+    """
+    global _SMI_PROC, _smi_started
+    try:
+        proc = subprocess.Popen(
+            ["nvidia-smi", SMI_QUERY_GPU, "--format=csv,noheader,nounits", "-lms", str(SMI_STREAM_MS)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+    except OSError as e:
+        logger.warning("Could not start nvidia-smi collector: %s", e)
+        return
+
+    with _SMI_LOCK:
+        _SMI_PROC = proc
+        _smi_started = time.monotonic()
+        _SMI_LATEST.clear()
+    threading.Thread(target=read_smi_stream, args=(proc,), daemon=True).start()
+
+
+def stop_smi_stream():
+    """Kill the nvidia-smi collector, if one is running"""
+    global _SMI_PROC
+    with _SMI_LOCK:
+        proc, _SMI_PROC = _SMI_PROC, None
+        _SMI_LATEST.clear()
+    if proc:
+        proc.kill()
+        proc.wait()
+
+
+def restart_stale_smi_stream():
+    """Restart the collector if it exited or stopped producing parseable rows"""
+    with _SMI_LOCK:
+        proc = _SMI_PROC
+        last_row = max((stamp for stamp, _ in _SMI_LATEST.values()), default=_smi_started)
+        started = _smi_started
+    if proc is None:
+        return
+
+    now = time.monotonic()
+    stale = proc.poll() is not None or now - max(last_row, started) > SMI_STALE_SECONDS
+    if stale and now - started > SMI_RESTART_SECONDS:
+        log_throttled("smi-stream", "nvidia-smi collector stalled or exited; restarting it")
+        stop_smi_stream()
+        start_smi_stream()
+
+
+def read_smi_stream(proc: subprocess.Popen):
+    """Parse streamed nvidia-smi rows into `_SMI_LATEST` until the process exits"""
+    for line in proc.stdout:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            gpu = parse_smi_line(line)
+        except (ValueError, IndexError):
+            # Error rows ("GPU is lost", ...) leave the stamp to go stale
+            continue
+        with _SMI_LOCK:
+            if _SMI_PROC is not proc:
+                return
+            _SMI_LATEST[gpu["index"]] = (time.monotonic(), gpu)
+
+    # Collector is gone; fall back to one-shot nvidia-smi queries
+    with _SMI_LOCK:
+        if _SMI_PROC is proc:
+            _SMI_LATEST.clear()
+
+
+def start_dind_helper():
+    """Pull the CUDA image and start a long-lived host-PID container for nvidia-smi.
+
+    Only used when the API itself runs in a container and cannot see host
+    processes. Runs in the background at startup; the process-memory fallback
+    stays off until the helper is up, so metrics never wait on an image pull.
+    Setting `_DIND_STOP` aborts the pull and skips starting the container.
+    """
+    try:
+        # Poll the pull so shutdown doesn't have to wait up to its full timeout
+        pull = subprocess.Popen(
+            ["docker", "pull", DIND_IMAGE],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 600
+        while pull.poll() is None:
+            if _DIND_STOP.wait(0.5) or time.monotonic() > deadline:
+                pull.kill()
+                pull.wait()
+                return
+        if pull.returncode != 0:
+            raise RuntimeError(f"docker pull {DIND_IMAGE} exited with {pull.returncode}")
+
+        subprocess.run(["docker", "rm", "-f", DIND_CONTAINER], capture_output=True, timeout=30)
+        if _DIND_STOP.is_set():
+            return
+        subprocess.run(
+            [
+                "docker", "run", "-d", "--rm", "--name", DIND_CONTAINER,
+                "--pid=host", "--gpus", "all", DIND_IMAGE, "sleep", "infinity",
+            ],
+            capture_output=True, check=True, timeout=60,
+        )
+        _DIND_READY.set()
+    except Exception as e:
+        logger.warning("Docker-in-Docker nvidia-smi fallback unavailable: %s", e)
+
+
+def stop_dind_helper():
+    """Remove the nvidia-smi helper container"""
+    _DIND_READY.clear()
+    try:
+        subprocess.run(["docker", "rm", "-f", DIND_CONTAINER], capture_output=True, timeout=30)
+    except Exception as e:
+        logger.warning("Error removing %s: %s", DIND_CONTAINER, e)
+
+
+# Initialize CPU percent and NVML on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize psutil CPU percent with a baseline reading"""
+    """Initialize psutil CPU baseline, NVML GPU handles, the shared HTTP client
+    and the background metrics poller"""
+    global _HTTPX, _SNAPSHOT
     psutil.cpu_percent(interval=None)
+    _HTTPX = httpx.AsyncClient(
+        timeout=2.0,
+        # Keep one warm connection per model port across dashboard polls
+        limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=30.0),
+    )
+
+    nvml_ready = False
+    try:
+        pynvml.nvmlInit()
+        nvml_ready = True
+        handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+        static = [get_gpu_static(i, h) for i, h in enumerate(handles)]
+        # Publish together: a half-initialized NVML state would skip the
+        # nvidia-smi fallback and report no GPUs
+        _GPU_HANDLES[:] = handles
+        _GPU_STATIC[:] = static
+    except pynvml.NVMLError as e:
+        _GPU_HANDLES.clear()
+        _GPU_STATIC.clear()
+        logger.warning("NVML unavailable, falling back to nvidia-smi: %s", e)
+
+    if not _GPU_HANDLES:
+        check_persistence_mode()
+        start_smi_stream()
+    dind_task = None
+    if DIND_FALLBACK:
+        _DIND_STOP.clear()
+        dind_task = asyncio.create_task(asyncio.to_thread(start_dind_helper))
+
+    # Fill the snapshot before serving so endpoints never see it empty
+    _SNAPSHOT = await collect_snapshot()
+    poller = asyncio.create_task(poll_metrics())
+
     yield
 
-app = FastAPI(title="DGX Spark Metrics API", lifespan=lifespan)
+    poller.cancel()
+    with suppress(asyncio.CancelledError):
+        await poller
+    await _HTTPX.aclose()
+    stop_smi_stream()
+    if dind_task:
+        # Let the helper thread finish (or abort) before removing its container,
+        # so a late `docker run` can't leave it behind
+        _DIND_STOP.set()
+        await dind_task
+        await asyncio.to_thread(stop_dind_helper)
+    _GPU_HANDLES.clear()
+    _GPU_STATIC.clear()
+    if nvml_ready:
+        pynvml.nvmlShutdown()
+
+# orjson serializes the float-heavy metrics payloads several times faster than json
+app = FastAPI(
+    title="DGX Spark Metrics API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Enable CORS for the frontend
 app.add_middleware(
@@ -48,125 +337,319 @@ app.add_middleware(
 add_auth_middleware(app)
 
 
+def ttl_cache(seconds: float, maxsize: Optional[int] = None):
+    """Memoize a function's result per arguments for `seconds`.
+
+    Dashboard widgets and browser tabs poll the same endpoints every few
+    seconds; this makes N concurrent pollers share one collection. A lock
+    per argument tuple collapses simultaneous refreshes into a single call.
+    Exceptions are not cached, so transient failures are retried. With
+    `maxsize`, the oldest entries are evicted first.
+    """
+    def decorator(func):
+        cache: Dict[tuple, tuple] = {}
+        locks: Dict[tuple, Any] = {}
+        # Guards insert/evict across worker threads (per-key locks don't)
+        guard = threading.Lock()
+
+        def lookup(args):
+            entry = cache.get(args)
+            if entry and time.monotonic() - entry[0] < seconds:
+                return entry
+            return None
+
+        def store(args, value):
+            with guard:
+                cache.pop(args, None)  # Re-insert so dict order tracks refresh time
+                cache[args] = (time.monotonic(), value)
+                if maxsize is not None:
+                    while len(cache) > maxsize:
+                        oldest = next(iter(cache))
+                        del cache[oldest]
+                        locks.pop(oldest, None)
+
+        def key_lock(args, factory):
+            with guard:
+                return locks.setdefault(args, factory())
+
+        def discard_lock(args, lock):
+            # Failed calls store nothing, so eviction would never reach their lock
+            with guard:
+                if locks.get(args) is lock:
+                    del locks[args]
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args):
+                entry = lookup(args)
+                if entry:
+                    return entry[1]
+                lock = key_lock(args, asyncio.Lock)
+                async with lock:
+                    # Another task may have refreshed while we waited
+                    entry = lookup(args)
+                    if entry:
+                        return entry[1]
+                    try:
+                        value = await func(*args)
+                    except BaseException:
+                        discard_lock(args, lock)
+                        raise
+                    store(args, value)
+                    return value
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            entry = lookup(args)
+            if entry:
+                return entry[1]
+            lock = key_lock(args, threading.Lock)
+            with lock:
+                # Another thread may have refreshed while we waited
+                entry = lookup(args)
+                if entry:
+                    return entry[1]
+                try:
+                    value = func(*args)
+                except BaseException:
+                    discard_lock(args, lock)
+                    raise
+                store(args, value)
+                return value
+
+        return wrapper
+    return decorator
+
+
+def sum_process_memory(output: str) -> float:
+    """Sum the used_memory column of `nvidia-smi --query-compute-apps` CSV output"""
+    total_memory = 0.0
+    for line in output.strip().split("\n"):
+        if line:
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) >= 2:
+                try:
+                    total_memory += float(parts[1])
+                except ValueError:
+                    pass
+    return total_memory
+
+
+# Forks nvidia-smi (and `docker exec` with DinD); the poller runs every 0.5s,
+# so refresh at most every few ticks
+@ttl_cache(2.0)
 def get_gpu_process_memory() -> Dict[int, float]:
     """Get GPU memory usage by summing per-process memory (for GPUs that don't report total)"""
     try:
         # First try direct nvidia-smi
-        cmd = [
-            "nvidia-smi",
-            "--query-compute-apps=gpu_uuid,used_memory",
-            "--format=csv,noheader,nounits",
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        result = subprocess.run(_APPS_CMD, capture_output=True, env=_SMI_ENV, check=True, timeout=3)
 
-        total_memory = 0.0
-        for line in result.stdout.strip().split("\n"):
-            if line:
-                parts = [p.strip() for p in line.split(",")]
-                if len(parts) >= 2:
-                    try:
-                        total_memory += float(parts[1])
-                    except ValueError:
-                        pass
+        total_memory = sum_process_memory(result.stdout.decode("ascii", "replace"))
 
         # If no processes found, try via docker with host PID namespace
         # This is needed when running inside a container
-        if total_memory == 0.0:
-            docker_cmd = [
-                "docker", "run", "--rm", "--pid=host", "--gpus", "all",
-                "nvidia/cuda:12.0.0-base-ubuntu20.04",
-                "nvidia-smi", "--query-compute-apps=pid,used_memory",
-                "--format=csv,noheader,nounits"
-            ]
-            result = subprocess.run(docker_cmd, capture_output=True, text=True, timeout=10)
+        if total_memory == 0.0 and _DIND_READY.is_set():
+            result = subprocess.run(_DIND_APPS_CMD, capture_output=True, timeout=3)
             if result.returncode == 0:
-                for line in result.stdout.strip().split("\n"):
-                    if line:
-                        parts = [p.strip() for p in line.split(",")]
-                        if len(parts) >= 2:
-                            try:
-                                total_memory += float(parts[1])
-                            except ValueError:
-                                pass
+                total_memory += sum_process_memory(result.stdout.decode("ascii", "replace"))
 
         return {0: total_memory}  # Return dict keyed by GPU index
     except Exception as e:
-        print(f"Error getting GPU process memory: {e}")
+        log_throttled("gpu-process-memory", "Error getting GPU process memory: %s", e)
         return {}
 
 
-def get_gpu_metrics() -> List[Dict[str, Any]]:
-    """Get GPU metrics using nvidia-smi"""
+def nvml_value(func, *args, default: float = 0.0):
+    """Call an NVML accessor, returning default if the GPU doesn't support it"""
     try:
-        cmd = [
-            "nvidia-smi",
-            "--query-gpu=index,name,temperature.gpu,power.draw,power.limit,memory.used,memory.total,utilization.gpu",
-            "--format=csv,noheader,nounits",
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-        def safe_float(value: str, default: float = 0.0) -> float:
-            """Convert string to float, handling N/A and [N/A] values"""
-            value = value.strip()
-            if value in ["N/A", "[N/A]", "", "Not Supported"]:
-                return default
-            try:
-                return float(value)
-            except ValueError:
-                return default
+        return func(*args)
+    except pynvml.NVMLError:
+        return default
+
+
+def get_gpu_static(index: int, handle) -> Dict[str, Any]:
+    """Read the GPU attributes that never change while the driver is loaded"""
+    name = pynvml.nvmlDeviceGetName(handle)
+    if isinstance(name, bytes):
+        name = name.decode()
+
+    memory = nvml_value(pynvml.nvmlDeviceGetMemoryInfo, handle, default=None)
+    if memory:
+        memory_total = memory.total / (1024 ** 2)  # Convert to MiB
+    elif "GB10" in name:
+        # GB10 has 128GB unified memory and doesn't report it, use that as total
+        memory_total = 128 * 1024  # 128 GB in MiB
+    else:
+        memory_total = 1.0  # Fallback
+
+    return {
+        "index": index,
+        "name": name,
+        # Default high value for limit
+        "powerLimit": nvml_value(
+            pynvml.nvmlDeviceGetPowerManagementLimit, handle, default=999000.0
+        ) / 1000,  # mW -> W
+        "memoryTotal": memory_total,
+    }
 
+
+def nvml_process_memory(handle) -> float:
+    """Sum the memory used by compute processes on a GPU, in MiB (0.0 if unavailable)"""
+    processes = nvml_value(pynvml.nvmlDeviceGetComputeRunningProcesses, handle, default=None)
+    if not processes:
+        return 0.0
+    return sum(p.usedGpuMemory or 0 for p in processes) / (1024 ** 2)
+
+
+def get_gpu_metrics() -> List[Dict[str, Any]]:
+    """Get GPU metrics via NVML, falling back to nvidia-smi if NVML is unavailable"""
+    if not _GPU_HANDLES:
+        return get_gpu_metrics_smi()
+
+    try:
         gpus = []
         process_memory = None  # Lazy load only if needed
 
-        for line in result.stdout.strip().split("\n"):
-            if line:
-                parts = [p.strip() for p in line.split(",")]
-                gpu_index = int(parts[0])
-                memory_used = safe_float(parts[5])
-                memory_total = safe_float(parts[6], 0.0)
-
-                # If memory reports N/A, try to get it from process list
-                if memory_used == 0.0 and memory_total == 0.0:
+        for handle, static in zip(_GPU_HANDLES, _GPU_STATIC):
+            memory = nvml_value(pynvml.nvmlDeviceGetMemoryInfo, handle, default=None)
+            if memory:
+                memory_used = memory.used / (1024 ** 2)  # Convert to MiB
+            else:
+                # If memory reports N/A (GB10 unified memory), sum the per-process
+                # usage NVML reports, and only then fall back to nvidia-smi
+                memory_used = nvml_process_memory(handle)
+                if not memory_used:
                     if process_memory is None:
                         process_memory = get_gpu_process_memory()
-                    memory_used = process_memory.get(gpu_index, 0.0)
-                    # GB10 has 128GB unified memory, use that as total
-                    if "GB10" in parts[1]:
-                        memory_total = 128 * 1024  # 128 GB in MiB
-                    else:
-                        memory_total = 1.0  # Fallback
-
-                gpus.append({
-                    "index": gpu_index,
-                    "name": parts[1],
-                    "temperature": safe_float(parts[2]),
-                    "powerDraw": safe_float(parts[3]),
-                    "powerLimit": safe_float(parts[4], 999.0),  # Default high value for limit
-                    "memoryUsed": memory_used,
-                    "memoryTotal": memory_total,
-                    "utilizationGpu": safe_float(parts[7]),
-                })
+                    memory_used = process_memory.get(static["index"], 0.0)
+
+            utilization = nvml_value(pynvml.nvmlDeviceGetUtilizationRates, handle, default=None)
+
+            gpu = static.copy()
+            gpu.update({
+                "temperature": float(nvml_value(
+                    pynvml.nvmlDeviceGetTemperature, handle, pynvml.NVML_TEMPERATURE_GPU
+                )),
+                "powerDraw": nvml_value(pynvml.nvmlDeviceGetPowerUsage, handle) / 1000,  # mW -> W
+                "memoryUsed": memory_used,
+                "utilizationGpu": float(utilization.gpu) if utilization else 0.0,
+            })
+            gpus.append(gpu)
+        return gpus
+    except Exception as e:
+        log_throttled("gpu-metrics", "Error getting GPU metrics: %s", e)
+        return []
+
+
+# Placeholders nvidia-smi prints for fields a GPU doesn't report
+_NA = frozenset(("N/A", "[N/A]", "", "Not Supported", "[Not Supported]"))
+
+
+def safe_float(value: str, default: float = 0.0) -> float:
+    """Convert an nvidia-smi field to float, handling N/A and [N/A] values"""
+    if value in _NA:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def load_smi_static() -> Dict[int, Dict[str, Any]]:
+    """Query the GPU attributes that never change (name, power limit, memory total)"""
+    cmd = ["nvidia-smi", SMI_QUERY_STATIC, "--format=csv,noheader,nounits"]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=10)
+
+    static = {}
+    for line in result.stdout.strip().split("\n"):
+        if line:
+            # nvidia-smi separates fields with ", "; GPU names may contain spaces
+            parts = line.split(", ")
+            static[int(parts[0])] = {
+                "index": int(parts[0]),
+                "name": parts[1],
+                "powerLimit": safe_float(parts[2], 999.0),  # Default high value for limit
+                "memoryTotal": safe_float(parts[3], 0.0),
+            }
+    return static
+
+
+def parse_smi_line(line: str) -> Dict[str, Any]:
+    """Parse one `nvidia-smi` SMI_QUERY_GPU CSV row into the changing metrics"""
+    parts = line.split(", ")
+    return {
+        "index": int(parts[0]),
+        "temperature": safe_float(parts[1]),
+        "powerDraw": safe_float(parts[2]),
+        "memoryUsed": safe_float(parts[3]),
+        "utilizationGpu": safe_float(parts[4]),
+    }
+
+
+def get_gpu_metrics_smi() -> List[Dict[str, Any]]:
+    """Get GPU metrics using nvidia-smi (streamed rows when the collector is running)"""
+    try:
+        if not _SMI_STATIC:
+            _SMI_STATIC.update(load_smi_static())
+
+        restart_stale_smi_stream()
+        now = time.monotonic()
+        with _SMI_LOCK:
+            rows = [row for _, row in sorted(_SMI_LATEST.items())]
+        readings = [gpu for stamp, gpu in rows if now - stamp <= SMI_STALE_SECONDS]
+
+        # Any stale GPU means the stream can't be trusted; the one-shot query has a timeout
+        if not readings or len(readings) < len(rows):
+            result = subprocess.run(_GPU_CMD, capture_output=True, env=_SMI_ENV, check=True, timeout=10)
+            output = result.stdout.decode("ascii", "replace")
+            readings = [parse_smi_line(line) for line in output.strip().split("\n") if line]
+
+        gpus = []
+        process_memory = None  # Lazy load only if needed
+
+        for reading in readings:
+            gpu = dict(_SMI_STATIC.get(reading["index"]) or {
+                "index": reading["index"], "name": "Unknown", "powerLimit": 999.0, "memoryTotal": 0.0,
+            })
+            gpu.update(reading)
+
+            # If memory reports N/A, try to get it from process list
+            if gpu["memoryUsed"] == 0.0 and gpu["memoryTotal"] == 0.0:
+                if process_memory is None:
+                    process_memory = get_gpu_process_memory()
+                gpu["memoryUsed"] = process_memory.get(gpu["index"], 0.0)
+                # GB10 has 128GB unified memory, use that as total
+                if "GB10" in gpu["name"]:
+                    gpu["memoryTotal"] = 128 * 1024  # 128 GB in MiB
+                else:
+                    gpu["memoryTotal"] = 1.0  # Fallback
+            gpus.append(gpu)
         return gpus
     except Exception as e:
-        print(f"Error getting GPU metrics: {e}")
+        log_throttled("gpu-metrics", "Error getting GPU metrics: %s", e)
         return []
 
 
+# Installed RAM never changes while we run
+_MEMORY_TOTAL_GB = psutil.virtual_memory().total / (1024 ** 3)
+
 def get_system_metrics() -> Dict[str, Any]:
     """Get system memory and CPU metrics"""
     try:
         memory = psutil.virtual_memory()
-        # Use interval=1 to get accurate CPU usage over 1 second
-        # This measures total CPU usage across all cores
-        cpu_percent = psutil.cpu_percent(interval=1, percpu=False)
+        # Non-blocking: total CPU usage across all cores since the previous call
+        # (baseline primed in lifespan), i.e. over one poller interval
+        cpu_percent = psutil.cpu_percent(interval=None)
 
         return {
             "memoryUsed": memory.used / (1024 ** 3),  # Convert to GB
-            "memoryTotal": memory.total / (1024 ** 3),  # Convert to GB
+            "memoryTotal": _MEMORY_TOTAL_GB,
             "cpuUsage": cpu_percent,
         }
     except Exception as e:
-        print(f"Error getting system metrics: {e}")
+        log_throttled("system-metrics", "Error getting system metrics: %s", e)
         return {
             "memoryUsed": 0,
             "memoryTotal": 0,
@@ -175,89 +658,200 @@ def get_system_metrics() -> Dict[str, Any]:
 
 
 @app.get("/api/metrics")
-async def get_metrics():
-    """Get all system and GPU metrics"""
-    gpus = get_gpu_metrics()
-    system = get_system_metrics()
-
-    return {
-        "gpus": gpus,
+async def get_metrics(request: Request, gpus: Optional[str] = None):
+    """Get all system and GPU metrics (from the latest poller snapshot)
+
+    The body is pre-encoded by the poller and shared by every client; the
+    snapshot timestamp doubles as an ETag so repeat polls within one refresh
+    get a bodiless 304. `gpus=0,1` limits the response to those GPU indices.
+    """
+    snapshot = _SNAPSHOT
+    wanted = None
+    if gpus is not None:
+        try:
+            wanted = {int(index) for index in gpus.split(",") if index.strip()}
+        except ValueError:
+            raise HTTPException(status_code=400, detail="gpus must be a comma-separated list of indices")
+    # A blank filter (`?gpus=` or `?gpus=,`) means all GPUs
+    if not wanted:
+        etag = snapshot["etag"]
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(snapshot["metrics"], media_type="application/json", headers={"ETag": etag})
+
+    etag = f'"{snapshot["ts"]}-{"-".join(map(str, sorted(wanted)))}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    system = snapshot["system"]
+    body = orjson.dumps({
+        "gpus": [gpu for gpu in snapshot["gpus"] if gpu["index"] in wanted],
         "memoryUsed": system["memoryUsed"],
         "memoryTotal": system["memoryTotal"],
         "cpuUsage": system["cpuUsage"],
-        "timestamp": int(time.time() * 1000),
-    }
+        "timestamp": snapshot["ts"],
+    })
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@app.get("/api/metrics/stream")
+async def stream_metrics(interval: float = 1.0):
+    """Push /api/metrics payloads as Server-Sent Events
+
+    An alternative to polling: one open connection per client receives each
+    new snapshot, at most every `interval` seconds (never faster than the poller).
+    """
+    interval = max(interval, POLL_INTERVAL)
+
+    async def events():
+        last_ts = None
+        while True:
+            snapshot = _SNAPSHOT
+            if snapshot["ts"] != last_ts:
+                last_ts = snapshot["ts"]
+                yield b"data: " + snapshot["metrics"] + b"\n\n"
+            await asyncio.sleep(interval)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+MODELS = [
+    {"name": "Qwen3-Coder-30B", "port": 8100, "health_endpoint": "/health"},
+    {"name": "Qwen2-VL-7B", "port": 8101, "health_endpoint": "/health"},
+    {"name": "Qwen3-VL-30B", "port": 8102, "health_endpoint": "/health"},
+    {"name": "Ministral-3-14B", "port": 8103, "health_endpoint": "/health"},
+]
+
+# (name, port, health URL) triples, built once so probes do no per-request formatting
+_MODELS = tuple(
+    (m["name"], m["port"], f"http://localhost:{m['port']}{m['health_endpoint']}")
+    for m in MODELS
+)
 
 
-@app.get("/api/models")
-async def get_model_status():
-    """Check the health status of vLLM model servers"""
-    models = [
-        {"name": "Qwen3-Coder-30B", "port": 8100, "health_endpoint": "/health"},
-        {"name": "Qwen2-VL-7B", "port": 8101, "health_endpoint": "/health"},
-        {"name": "Qwen3-VL-30B", "port": 8102, "health_endpoint": "/health"},
-        {"name": "Ministral-3-14B", "port": 8103, "health_endpoint": "/health"},
-    ]
-
-    results = []
-    for model in models:
-        try:
-            start = time.time()
-            response = requests.get(
-                f"http://localhost:{model['port']}{model['health_endpoint']}",
-                timeout=2
-            )
-            response_time = int((time.time() - start) * 1000)
-
-            results.append({
-                "name": model["name"],
-                "port": model["port"],
-                "healthy": response.status_code == 200,
-                "responseTime": response_time,
-            })
-        except Exception as e:
-            print(f"Error checking {model['name']}: {e}")
-            results.append({
-                "name": model["name"],
-                "port": model["port"],
-                "healthy": False,
-                "responseTime": None,
-            })
+async def probe_model(name: str, port: int, url: str) -> Dict[str, Any]:
+    """Check a single model server's health endpoint"""
+    try:
+        start = time.monotonic_ns()
+        response = await _HTTPX.get(url)
+        response_time = (time.monotonic_ns() - start) // 1_000_000
 
-    return results
+        return {
+            "name": name,
+            "port": port,
+            "healthy": response.status_code == 200,
+            "responseTime": response_time,
+        }
+    except Exception as e:
+        log_throttled(f"probe:{name}", "Error checking %s: %s", name, e)
+        return {
+            "name": name,
+            "port": port,
+            "healthy": False,
+            "responseTime": None,
+        }
 
 
-@app.get("/api/containers")
-async def get_docker_containers():
-    """Get Docker container status"""
+@app.get("/api/models")
+@ttl_cache(0.8)
+async def get_model_status():
+    """Check the health status of vLLM model servers (probed in parallel)"""
+    return list(await asyncio.gather(*(probe_model(*model) for model in _MODELS)))
+
+
+def format_ports(ports: List[Dict[str, Any]]) -> str:
+    """Format Engine API port bindings the way `docker ps` prints them"""
+    formatted = []
+    for port in ports:
+        if port.get("PublicPort"):
+            ip = port.get("IP", "")
+            host = f"[{ip}]" if ":" in ip else ip
+            formatted.append(f"{host}:{port['PublicPort']}->{port['PrivatePort']}/{port['Type']}")
+        else:
+            formatted.append(f"{port['PrivatePort']}/{port['Type']}")
+    return ", ".join(formatted)
+
+
+# Container status changes far more slowly than GPU load; refresh it every
+# few poller ticks rather than on each one
+@ttl_cache(2.0)
+def list_docker_containers() -> List[Dict[str, str]]:
+    """Get Docker container status from the Engine API"""
     try:
-        cmd = [
-            "docker", "ps", "-a",
-            "--format", "{{.Names}}|{{.Status}}|{{.Ports}}",
+        response = _DOCKER.get("/containers/json", params={"all": "true"})
+        response.raise_for_status()
+
+        return [
+            {
+                "name": container["Names"][0].lstrip("/") if container.get("Names") else container["Id"][:12],
+                "status": container.get("Status", ""),
+                "ports": format_ports(container.get("Ports") or []),
+            }
+            for container in response.json()
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-
-        containers = []
-        for line in result.stdout.strip().split("\n"):
-            if line:
-                parts = line.split("|")
-                if len(parts) >= 2:
-                    containers.append({
-                        "name": parts[0],
-                        "status": parts[1],
-                        "ports": parts[2] if len(parts) > 2 else "",
-                    })
-
-        return containers
     except Exception as e:
-        print(f"Error getting Docker containers: {e}")
+        log_throttled("containers", "Error getting Docker containers: %s", e)
         return []
 
 
+@app.get("/api/containers")
+async def get_docker_containers():
+    """Get Docker container status (from the latest poller snapshot)"""
+    return _SNAPSHOT["containers"]
+
+
+async def collect_snapshot() -> Dict[str, Any]:
+    """Run the blocking collectors off the event loop and bundle their results"""
+    gpus, system, containers = await asyncio.gather(
+        asyncio.to_thread(get_gpu_metrics),
+        asyncio.to_thread(get_system_metrics),
+        asyncio.to_thread(list_docker_containers),
+    )
+    ts = time.time_ns() // 1_000_000
+    return {
+        "gpus": gpus,
+        "system": system,
+        "containers": containers,
+        "ts": ts,
+        # /api/metrics body, encoded once here instead of once per request
+        "metrics": orjson.dumps({
+            "gpus": gpus,
+            "memoryUsed": system["memoryUsed"],
+            "memoryTotal": system["memoryTotal"],
+            "cpuUsage": system["cpuUsage"],
+            "timestamp": ts,
+        }),
+        "etag": f'"{ts}"',
+    }
+
+
+async def poll_metrics():
+    """Refresh the shared snapshot every POLL_INTERVAL seconds until cancelled.
+
+    One producer serves any number of dashboard clients: endpoints only read
+    `_SNAPSHOT`, which is swapped wholesale so readers never see a partial update.
+    """
+    global _SNAPSHOT
+    while True:
+        await asyncio.sleep(POLL_INTERVAL)
+        try:
+            _SNAPSHOT = await collect_snapshot()
+        except Exception as e:
+            log_throttled("snapshot", "Error refreshing metrics snapshot: %s", e)
+
+
+# Pre-encoded body: liveness probes hit this far more often than anything else
+_HEALTH_BYTES = b'{"status":"ok"}'
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {"status": "ok"}
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 class SearchRequest(BaseModel):
@@ -265,42 +859,51 @@ class SearchRequest(BaseModel):
     max_results: int = 5
 
 
-@app.post("/api/search")
-async def web_search(request: SearchRequest):
-    """Perform web search using SearXNG"""
+@ttl_cache(30, maxsize=256)
+def searxng_search(query: str) -> List[Dict[str, Any]]:
+    """Query the SearXNG JSON API (repeat queries are served from cache)"""
     # SearXNG endpoint - configurable via environment variable
     SEARXNG_URL = os.getenv('SEARXNG_URL', 'http://localhost:8080')
 
+    response = _SESSION.get(
+        f"{SEARXNG_URL}/search",
+        params={
+            'q': query,
+            'format': 'json',
+            'pageno': 1
+        },
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json().get('results', [])
+
+
+@app.post("/api/search")
+async def web_search(request: SearchRequest):
+    """Perform web search using SearXNG"""
     try:
-        print(f"🔍 Search Request: '{request.query}'")
-
-        # Query SearXNG API
-        response = requests.get(
-            f"{SEARXNG_URL}/search",
-            params={
-                'q': request.query,
-                'format': 'json',
-                'pageno': 1
-            },
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
+        logger.info("Search request: %r", request.query)
+
+        search_results_list = await asyncio.to_thread(searxng_search, request.query)
+        logger.info("Found %d results from SearXNG", len(search_results_list))
 
-        search_results_list = data.get('results', [])
-        print(f"🔍 Found {len(search_results_list)} results from SearXNG")
+        top_results = search_results_list[:request.max_results]
+
+        # For the top 2 results, try to fetch more detailed content (concurrently)
+        # This makes the search work for ANY topic, not just hardcoded ones
+        page_urls = [result['url'] for result in top_results[:2] if result.get('url')]
+        page_summaries = dict(zip(page_urls, await asyncio.gather(
+            *(asyncio.to_thread(fetch_page_summary, url) for url in page_urls)
+        )))
 
         results = []
-        for i, result in enumerate(search_results_list[:request.max_results]):
+        for i, result in enumerate(top_results):
             url = result.get('url', '')
             snippet = result.get('content', '')
 
-            # For the top 2 results, try to fetch more detailed content
-            # This makes the search work for ANY topic, not just hardcoded ones
-            if url and i < 2:
-                page_summary = fetch_page_summary(url)
-                if page_summary:
-                    snippet = f"Page Content: {page_summary} ... {snippet}"
+            page_summary = page_summaries.get(url) if i < 2 else None
+            if page_summary:
+                snippet = f"Page Content: {page_summary} ... {snippet}"
 
             results.append({
                 'title': result.get('title', ''),
@@ -315,87 +918,127 @@ async def web_search(request: SearchRequest):
         }
 
     except Exception as e:
-        print(f"Error performing search: {e}")
+        logger.warning("Error performing search: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+SUMMARY_MAX_CHARS = 1000
+PAGE_MAX_BYTES = 256_000  # Only the start of a page can end up in the summary
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
 def fetch_page_summary(url: str) -> Optional[str]:
     """Fetch a webpage and extract a summary of its content"""
     try:
-        from bs4 import BeautifulSoup
+        return cached_page_summary(url)
+    except Exception as e:
+        logger.info("Error fetching page summary for %s: %s", url, e)
+        return None
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        # Short timeout to keep search fast
-        response = requests.get(url, headers=headers, timeout=3)
 
-        if not response.ok:
-            return None
+@ttl_cache(300, maxsize=256)
+def cached_page_summary(url: str) -> str:
+    """Download and summarize a page; raises on failure so errors aren't cached"""
+    from selectolax.lexbor import LexborHTMLParser
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    }
+    # Short timeout to keep search fast; stream so huge pages stop at the cap
+    with _SESSION.get(url, headers=headers, timeout=3, stream=True) as response:
+        response.raise_for_status()
 
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(65536):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= PAGE_MAX_BYTES:
+                break
+        html = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
 
-        # Get text
-        text = soup.get_text()
+    # C-backed (Lexbor) parser; much faster than BeautifulSoup's html.parser
+    tree = LexborHTMLParser(html)
 
-        # Break into lines and remove leading/trailing space on each
-        lines = (line.strip() for line in text.splitlines())
-        # Break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # Drop blank lines
-        text = ' '.join(chunk for chunk in chunks if chunk)
+    # Remove script and style elements
+    tree.strip_tags(["script", "style", "nav", "footer", "header"])
 
-        # Get meta description if available
-        description = ""
-        meta_desc = soup.find("meta", attrs={"name": "description"}) or soup.find("meta", attrs={"property": "og:description"})
-        if meta_desc:
-            description = meta_desc.get("content", "")
+    # Get body text (skipping <head>/<title>); the separator keeps adjacent
+    # elements from running together
+    node = tree.body or tree.root
+    text = node.text(separator=" ") if node else ""
 
-        # Combine description and first part of text
-        summary = f"{description} {text}"
-        
-        # Limit to reasonable length (e.g. 1000 chars) to avoid overwhelming context
-        return summary[:1000]
+    # Collapse all whitespace runs (newlines, indentation) in one C-level pass,
+    # keeping only what can end up in the summary
+    text = _WHITESPACE_RE.sub(" ", text).strip()[:SUMMARY_MAX_CHARS]
 
-    except Exception as e:
-        print(f"Error fetching page summary for {url}: {e}")
-        return None
+    # Get meta description if available
+    description = ""
+    meta_desc = tree.css_first('meta[name="description"]') or tree.css_first('meta[property="og:description"]')
+    if meta_desc:
+        description = meta_desc.attributes.get("content") or ""
+
+    # Combine description and first part of text
+    summary = f"{description} {text}"
+    
+    # Limit to reasonable length (e.g. 1000 chars) to avoid overwhelming context
+    return summary[:SUMMARY_MAX_CHARS]
 
 
 @app.post("/api/chat/proxy/{port}")
 async def proxy_chat(port: int, request: dict):
-    """Proxy chat requests to model servers to avoid browser CORS issues"""
+    """Proxy chat requests to model servers to avoid browser CORS issues
+
+    The upstream body is streamed through as it arrives (token by token for
+    stream=true requests) instead of being buffered and re-serialized.
+    """
     target_url = f"http://127.0.0.1:{port}/v1/chat/completions"
 
     try:
-        print(f"🔀 Proxying chat request to port {port} (payload size: {len(json.dumps(request))} bytes)")
-        response = requests.post(
-            target_url,
-            json=request,
-            headers={"Content-Type": "application/json"},
-            timeout=300.0
+        logger.info("Proxying chat request to port %d", port)
+        upstream = await _HTTPX.send(
+            _HTTPX.build_request("POST", target_url, json=request, timeout=300.0),
+            stream=True,
         )
-        print(f"🔀 Proxy response: {response.status_code}")
-        return response.json()
-    except requests.Timeout:
-        print(f"🔀 Proxy timeout to port {port}")
+    except httpx.TimeoutException:
+        logger.warning("Proxy timeout to port %d", port)
         raise HTTPException(status_code=504, detail="Request to model server timed out")
     except Exception as e:
-        print(f"🔀 Proxy error: {e}")
+        logger.warning("Proxy error: %s", e)
         raise HTTPException(status_code=502, detail=str(e))
 
+    logger.info("Proxy response: %d", upstream.status_code)
+    return StreamingResponse(
+        upstream.aiter_bytes(),
+        status_code=upstream.status_code,
+        media_type=upstream.headers.get("content-type", "application/json"),
+        background=BackgroundTask(upstream.aclose),
+    )
+
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.getenv("DGX_LOG_LEVEL", "info").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
     print("Starting DGX Spark Metrics API on http://localhost:5174")
     print("Endpoints:")
     print("  - GET /api/metrics     - System and GPU metrics")
+    print("  - GET /api/metrics/stream - Metrics as Server-Sent Events")
     print("  - GET /api/models      - Model server status")
     print("  - GET /api/containers  - Docker container status")
     print("  - POST /api/search     - Web search (SearXNG)")
     print("  - POST /api/chat/proxy/{port} - Proxy chat to model")
     print("  - GET /health          - Health check")
-    uvicorn.run(app, host="0.0.0.0", port=5174)
+    # Single worker on purpose: the snapshot poller, nvidia-smi collector and
+    # caches are per-process, so extra workers would only duplicate that work.
+    # uvloop/httptools ship with uvicorn[standard]; access logs are skipped
+    # because the dashboard polls several endpoints every second.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=5174,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+    )